@@ -1,12 +1,18 @@
+import collections
+import re
 import sys
 import serial
 import serial.tools.list_ports
-import time
+from transport import UartTransport, enable_low_latency, set_vmin_vtime
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QTextEdit, QMessageBox, QComboBox, QGroupBox
+    QLineEdit, QPlainTextEdit, QMessageBox, QComboBox, QGroupBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+
+# Validate hex input up front instead of letting int() raise:
+# typos are the common case and exceptions are the slow path
+_HEX_RE = re.compile(r"(?:0[xX])?[0-9A-Fa-f]{1,8}")
 
 SCB_REGISTERS = {
     "CPUID": 0xE000ED00,
@@ -17,12 +23,115 @@ SCB_REGISTERS = {
     "CCR":   0xE000ED14
 }
 
+class SerialWorker(QObject):
+    """
+    Performs all blocking serial I/O on a background thread so the GUI
+    event loop never freezes waiting on the device.
+    Commands arrive via the handle_command slot (queued connection) and
+    results come back through the response_ready signal.
+    """
+
+    response_ready = pyqtSignal(str, str)
+    error = pyqtSignal(str)
+    disconnected = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.transport = None
+
+    @pyqtSlot()
+    def handle_disconnect(self):
+        """
+        Close the serial port on the I/O thread.
+        Queued behind any in-flight command, so the port is never
+        yanked out from under a blocking read.
+        """
+
+        if self.transport:
+            try:
+                self.transport.ser.close()
+            except Exception:
+                pass
+            self.transport = None
+        self.disconnected.emit()
+
+    @pyqtSlot(str, object)
+    def handle_command(self, label, cmd):
+        """
+        Send one command to the device and emit its response
+        tagged with the caller-supplied label.
+        """
+
+        response = self.send_command(cmd)
+        self.response_ready.emit(label, response)
+
+    def send_command(self, cmd, timeout=0.5):
+        """
+        Send pre-encoded command bytes to the STM32 UART.
+        Poll the RX buffer and return as soon as a full line arrives,
+        instead of sleeping a fixed interval before reading.
+        Returns the response string.
+        """
+
+        if not self.transport or not self.transport.ser.is_open:
+            self.error.emit("Serial port not open.")
+            return "ERROR"
+        try:
+            response = self.transport.request(cmd, timeout)
+            self._emit_async()
+            return response
+        except Exception as e:
+            self.error.emit(f"Serial error: {e}")
+            return "ERROR"
+
+    def _emit_async(self):
+        """Forward any unsolicited firmware lines to the log."""
+
+        while self.transport.async_lines:
+            self.response_ready.emit("[async]", self.transport.async_lines.popleft())
+
+    @pyqtSlot()
+    def handle_scb_batch(self):
+        """
+        Read every SCB register in one paced batch.
+        Each 'read' goes out as soon as the previous response arrives,
+        so the whole sweep runs at firmware speed without a click per
+        register.
+        """
+
+        if not self.transport or not self.transport.ser.is_open:
+            self.error.emit("Serial port not open.")
+            return
+        try:
+            cmds = [f"read 0x{a:X}\r\n".encode() for a in SCB_REGISTERS.values()]
+            responses = self.transport.request_batch(cmds)
+            self._emit_async()
+            for name, response in zip(SCB_REGISTERS, responses):
+                self.response_ready.emit(name, response)
+        except Exception as e:
+            self.error.emit(f"Serial error: {e}")
+
+
 class STM32Terminal(QWidget):
+    command_requested = pyqtSignal(str, object)
+    scb_batch_requested = pyqtSignal()
+    disconnect_requested = pyqtSignal()
+
     def __init__(self):
-        """Initialize the GUI and serial variables."""
+        """Initialize the GUI, serial variables, and the I/O worker thread."""
 
         super().__init__()
         self.ser = None
+        self.io_thread = QThread(self)
+        self.worker = SerialWorker()
+        self.worker.moveToThread(self.io_thread)
+        self.command_requested.connect(self.worker.handle_command)
+        self.scb_batch_requested.connect(self.worker.handle_scb_batch)
+        self.disconnect_requested.connect(self.worker.handle_disconnect)
+        self.worker.disconnected.connect(self.on_disconnected)
+        self.worker.response_ready.connect(self.on_response)
+        self.worker.error.connect(self.show_error)
+        self.io_thread.start()
         self.init_ui()
 
     def init_ui(self):
@@ -30,8 +139,10 @@ class STM32Terminal(QWidget):
 
         self.setWindowTitle("STM32 UART Register Tool")
 
-        self.port_input = QLineEdit()
-        self.port_input.setPlaceholderText("Enter COM port (e.g., COM5)")
+        self.port_combo = QComboBox()
+        self.refresh_ports()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh_ports)
         self.baud_select = QComboBox()
         self.baud_select.addItems(["9600", "19200", "38400", "57600", "115200", "230400", "460800", "921600"])
         self.baud_select.setCurrentText("115200")
@@ -47,7 +158,8 @@ class STM32Terminal(QWidget):
 
         port_layout = QHBoxLayout()
         port_layout.addWidget(QLabel("Port:"))
-        port_layout.addWidget(self.port_input)
+        port_layout.addWidget(self.port_combo)
+        port_layout.addWidget(refresh_btn)
         port_layout.addWidget(QLabel("Baud:"))
         port_layout.addWidget(self.baud_select)
         port_layout.addWidget(connect_btn)
@@ -55,13 +167,21 @@ class STM32Terminal(QWidget):
 
         scb_group = QGroupBox("SCB Registers")
         scb_layout = QHBoxLayout()
+        # Encode the fixed SCB read commands once instead of per click
+        self._scb_cmds = {name: f"read 0x{addr:X}\r\n".encode()
+                          for name, addr in SCB_REGISTERS.items()}
         self.scb_buttons = []
-        for name, addr in SCB_REGISTERS.items():
+        for name in SCB_REGISTERS:
             btn = QPushButton(f"Read {name}")
-            btn.clicked.connect(lambda _, a=addr, n=name: self.read_scb_register(a, n))
+            btn.clicked.connect(lambda _, n=name: self.read_scb_register(n))
             btn.setEnabled(False)
             self.scb_buttons.append(btn)
             scb_layout.addWidget(btn)
+        read_all_btn = QPushButton("Read all SCB")
+        read_all_btn.clicked.connect(self.read_all_scb)
+        read_all_btn.setEnabled(False)
+        self.scb_buttons.append(read_all_btn)
+        scb_layout.addWidget(read_all_btn)
         scb_group.setLayout(scb_layout)
 
         self.read_addr_input = QLineEdit()
@@ -89,8 +209,21 @@ class STM32Terminal(QWidget):
         write_layout.addWidget(self.write_value_input)
         write_layout.addWidget(write_btn)
 
-        self.log = QTextEdit()
+        # QPlainTextEdit: none of QTextEdit's rich-text machinery, and a
+        # layout path built for append-heavy logs
+        self.log = QPlainTextEdit()
         self.log.setReadOnly(True)
+        # Read-only log: skip the undo stack and word-wrap relayout
+        # that would otherwise run on every append
+        self.log.setUndoRedoEnabled(False)
+        self.log.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.log.setMaximumBlockCount(5000)
+        # Batch log lines and flush on a timer so rapid polling doesn't
+        # relayout the document once per line
+        self._log_queue = collections.deque()
+        self._log_timer = QTimer(self)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_timer.start(50)
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(port_layout)
@@ -101,6 +234,25 @@ class STM32Terminal(QWidget):
         main_layout.addWidget(self.log)
         self.setLayout(main_layout)
 
+    def refresh_ports(self):
+        """Re-scan the system for serial ports and repopulate the dropdown."""
+
+        self.port_combo.clear()
+        self.port_combo.addItems([p.device for p in serial.tools.list_ports.comports()])
+
+    def append_log(self, msg):
+        """Queue a log line for the next batched flush."""
+
+        self._log_queue.append(msg)
+
+    def _flush_log(self):
+        """Append all queued lines to the log widget in one insertion."""
+
+        if not self._log_queue:
+            return
+        self.log.appendPlainText("\n".join(self._log_queue))
+        self._log_queue.clear()
+
     def connect_serial(self):
         """
         Attempt to open the serial port with user-specified COM port and baud rate.
@@ -108,27 +260,42 @@ class STM32Terminal(QWidget):
         On failure, show error message.
         """
 
-        port = self.port_input.text().strip()
+        port = self.port_combo.currentText().strip()
         baud = int(self.baud_select.currentText())
         if not port:
-            self.show_error("Please enter a COM port (e.g., COM5).")
+            self.show_error("No serial port selected. Plug in the board and hit Refresh.")
             return
         try:
-            self.ser = serial.Serial(port, baud, timeout=1)
-            self.log.append(f"Connected to {port} at {baud} baud.")
+            # Non-blocking reads; send_command polls in_waiting itself
+            self.ser = serial.Serial(port, baud, timeout=0)
+            enable_low_latency(self.ser)
+            set_vmin_vtime(self.ser)
+            self.worker.transport = UartTransport(self.ser)
+            self.append_log(f"Connected to {port} at {baud} baud.")
             self.set_connected_state(True)
         except serial.SerialException as e:
             self.show_error(f"Failed to open serial port: {e}")
 
     def disconnect_serial(self):
         """
-        Close the open serial port, disable register buttons,
-        and update log to indicate disconnection.
+        Ask the worker to close the serial port on the I/O thread;
+        buttons are updated once it reports back via on_disconnected.
         """
 
         if self.ser and self.ser.is_open:
-            self.ser.close()
-            self.log.append("Disconnected.")
+            self.disconnect_btn.setEnabled(False)
+            self.disconnect_requested.emit()
+        else:
+            self.set_connected_state(False)
+
+    def on_disconnected(self):
+        """
+        Update log and button state after the worker has closed the
+        serial port.
+        """
+
+        self.ser = None
+        self.append_log("Disconnected.")
         self.set_connected_state(False)
 
     def set_connected_state(self, connected):
@@ -145,70 +312,69 @@ class STM32Terminal(QWidget):
         self.connect_btn.setEnabled(not connected)
         self.disconnect_btn.setEnabled(connected)
 
-    def send_command(self, cmd):
+    def send_command(self, label, cmd):
         """
-        Send a command string to the STM32 UART.
-        Wait briefly and read the response line.
-        Log the command and response.
-        Returns the response string.
+        Queue a command for the worker thread and log it.
+        The response arrives asynchronously via on_response.
         """
 
-        if not self.ser or not self.ser.is_open:
-            self.show_error("Serial port not open.")
-            return "ERROR"
-        try:
-            self.ser.write(cmd.encode())
-            time.sleep(0.05)
-            response = self.ser.readline().decode(errors='ignore').strip()
-            self.log.append(f">> {cmd.strip()}\n{response}")
-            return response
-        except Exception as e:
-            self.show_error(f"Serial error: {e}")
-            return "ERROR"
+        self.append_log(f">> {cmd.decode().strip()}")
+        self.command_requested.emit(label, cmd)
+
+    def on_response(self, label, response):
+        """Log a response emitted by the worker thread."""
 
-    def read_scb_register(self, address, name):
+        self.append_log(f"{label}: {response}")
+
+    def read_all_scb(self):
         """
-        Format and send a 'read' command for a known SCB register.
-        Log the register name and response.
+        Queue a batched read of all SCB registers.
+        The worker sends each read as soon as the previous response
+        arrives; every response is logged under its register name.
         """
 
-        cmd = f"read 0x{address:X}\r\n"
-        response = self.send_command(cmd)
-        self.log.append(f"{name}: {response}")
+        self.append_log(">> read all SCB")
+        self.scb_batch_requested.emit()
+
+    def read_scb_register(self, name):
+        """
+        Queue the cached 'read' command for a known SCB register.
+        The response is logged under the register name.
+        """
+
+        self.send_command(name, self._scb_cmds[name])
 
     def read_custom_register(self):
         """
         Read address from user input, validate hex format.
-        Send read command to device and log response.
+        Queue read command for the device; response is logged on arrival.
         Show error if input invalid.
         """
 
         addr_str = self.read_addr_input.text().strip()
-        try:
-            addr = int(addr_str, 16)
-            cmd = f"read 0x{addr:X}\r\n"
-            response = self.send_command(cmd)
-            self.log.append(f"Read 0x{addr:X}: {response}")
-        except ValueError:
+        if not _HEX_RE.fullmatch(addr_str):
             self.show_error("Invalid address format. Use hex (e.g., 0x48000010).")
+            return
+        addr = int(addr_str, 16)
+        cmd = f"read 0x{addr:X}\r\n".encode()
+        self.send_command(f"Read 0x{addr:X}", cmd)
 
     def write_custom_register(self):
         """
         Read address and value from user input, validate hex format.
-        Send write command to device and log response.
+        Queue write command for the device; response is logged on arrival.
         Show error if input invalid.
         """
 
         addr_str = self.write_addr_input.text().strip()
         val_str = self.write_value_input.text().strip()
-        try:
-            addr = int(addr_str, 16)
-            val = int(val_str, 16)
-            cmd = f"write 0x{addr:X} 0x{val:X}\r\n"
-            response = self.send_command(cmd)
-            self.log.append(f"Wrote 0x{val:X} to 0x{addr:X}: {response}")
-        except ValueError:
+        if not (_HEX_RE.fullmatch(addr_str) and _HEX_RE.fullmatch(val_str)):
             self.show_error("Invalid address or value format. Use hex (e.g., 0x48000010).")
+            return
+        addr = int(addr_str, 16)
+        val = int(val_str, 16)
+        cmd = f"write 0x{addr:X} 0x{val:X}\r\n".encode()
+        self.send_command(f"Wrote 0x{val:X} to 0x{addr:X}", cmd)
 
     def show_error(self, msg):
         """
@@ -217,13 +383,16 @@ class STM32Terminal(QWidget):
         """
 
         QMessageBox.critical(self, "Error", msg)
-        self.log.append(f"{msg}")
+        self.append_log(f"{msg}")
 
     def closeEvent(self, event):
         """
-        Override QWidget close event to safely close serial port on exit.
+        Override QWidget close event to stop the worker thread and
+        safely close the serial port on exit.
         """
 
+        self.io_thread.quit()
+        self.io_thread.wait()
         if self.ser and self.ser.is_open:
             self.ser.close()
         event.accept()
@@ -1,5 +1,8 @@
+import os
+import selectors
+import sys
 import serial
-import time
+from transport import UartTransport, enable_low_latency, set_vmin_vtime
 
 # Change this to match your USB serial port
 SERIAL_PORT = 'COM9'
@@ -7,55 +10,125 @@ BAUD_RATE = 115200
 
 def open_serial(port, baudrate):
     try:
-        ser = serial.Serial(port, baudrate, timeout=1)
+        # Non-blocking reads; UartTransport polls in_waiting itself
+        ser = serial.Serial(port, baudrate, timeout=0)
+        enable_low_latency(ser)
+        set_vmin_vtime(ser)
         print(f"Connected to {port} at {baudrate} baud.")
         return ser
     except serial.SerialException as e:
         print(f"Failed to open serial port: {e}")
         return None
 
-def read_register(ser, address):
+def read_register(transport, address):
     cmd = f"read 0x{address:X}\r\n"
-    ser.write(cmd.encode())
-    response = ser.readline().decode().strip()
-    return response
+    return transport.request(cmd.encode())
 
-def write_register(ser, address, value):
+def write_register(transport, address, value):
     cmd = f"write 0x{address:X} 0x{value:X}\r\n"
-    ser.write(cmd.encode())
-    response = ser.readline().decode().strip()
-    return response
+    return transport.request(cmd.encode())
 
-def main():
-    ser = open_serial(SERIAL_PORT, BAUD_RATE)
-    if ser is None:
+def _print_async(transport):
+    while transport.async_lines:
+        print(f"[async] {transport.async_lines.popleft()}")
+
+def _do_read(transport, args):
+    if len(args) != 1:
+        print("Usage: read 0xADDR")
+        return
+    addr = int(args[0], 0)
+    resp = read_register(transport, addr)
+    _print_async(transport)
+    print(resp)
+
+def _do_write(transport, args):
+    if len(args) != 2:
+        print("Usage: write 0xADDR 0xVALUE")
         return
+    addr = int(args[0], 0)
+    val = int(args[1], 0)
+    resp = write_register(transport, addr, val)
+    _print_async(transport)
+    print(resp)
+
+def _bad(transport, args):
+    print("Invalid command. Use: read 0xADDR or write 0xADDR 0xVALUE")
+
+# Dispatch on the verb token instead of re-scanning the input string
+# with startswith for every command
+HANDLERS = {
+    "read": _do_read,
+    "write": _do_write,
+}
+
+def _dispatch(transport, line):
+    """Run one command line; returns False when the user wants out."""
+    tok = line.split()
+    if not tok:
+        return True
+    if tok[0] == "exit":
+        print("Exiting...")
+        return False
+    HANDLERS.get(tok[0], _bad)(transport, tok[1:])
+    return True
+
+def _run_select_loop(transport):
+    """
+    Watch stdin and the serial fd together, so unsolicited firmware
+    output prints the moment it arrives instead of sitting in the
+    driver until the next command. POSIX-only: Windows select() can't
+    watch a console handle.
+    """
+    sel = selectors.DefaultSelector()
+    sel.register(sys.stdin, selectors.EVENT_READ)
+    sel.register(transport.ser.fileno(), selectors.EVENT_READ)
+    running = True
+    print(">> ", end="", flush=True)
+    while running:
+        try:
+            for key, _ in sel.select():
+                if key.fileobj is sys.stdin:
+                    line = sys.stdin.readline()
+                    if not line:
+                        running = False
+                        break
+                    running = _dispatch(transport, line)
+                    if running:
+                        print(">> ", end="", flush=True)
+                else:
+                    transport.poll_async()
+                    _print_async(transport)
+        except KeyboardInterrupt:
+            print("\nCtrl+C detected. Exiting...")
+            break
+        except Exception as e:
+            print(f"Error: {e}")
+            print(">> ", end="", flush=True)
+    sel.close()
 
+def _run_input_loop(transport):
+    """Plain input() loop for platforms without a selectable stdin."""
     while True:
         try:
-            user_input = input(">> ").strip()
-            if user_input == "exit":
-                print("Exiting...")
+            if not _dispatch(transport, input(">> ")):
                 break
-            elif user_input.startswith("read "):
-                _, addr_str = user_input.split()
-                addr = int(addr_str, 16)
-                resp = read_register(ser, addr)
-                print(f"{resp}")
-            elif user_input.startswith("write "):
-                _, addr_str, val_str = user_input.split()
-                addr = int(addr_str, 16)
-                val = int(val_str, 16)
-                resp = write_register(ser, addr, val)
-                print(f"{resp}")
-            else:
-                print("Invalid command. Use: read 0xADDR or write 0xADDR 0xVALUE")
         except KeyboardInterrupt:
             print("\nCtrl+C detected. Exiting...")
             break
         except Exception as e:
             print(f"Error: {e}")
 
+def main():
+    ser = open_serial(SERIAL_PORT, BAUD_RATE)
+    if ser is None:
+        return
+    transport = UartTransport(ser)
+
+    if os.name == "posix":
+        _run_select_loop(transport)
+    else:
+        _run_input_loop(transport)
+
     ser.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+import collections
+import os
+import select
+import struct
+import time
+
+def enable_low_latency(ser):
+    """
+    Best-effort post-open tuning for USB-serial adapters.
+    FTDI/CH340-style bridges default to a ~16 ms latency timer that
+    dominates round-trip time for short register reads; set the
+    ASYNC_LOW_LATENCY flag and a 1 ms latency timer where the platform
+    supports it, and quietly leave the port alone where it doesn't.
+    """
+
+    try:
+        # Only pyserial's Linux backend grows this method; elsewhere
+        # the attribute itself is missing
+        ser.set_low_latency_mode(True)
+    except (AttributeError, ValueError, NotImplementedError):
+        pass
+    try:
+        tty = os.path.basename(ser.port)
+        with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", "w") as f:
+            f.write("1")
+    except OSError:
+        pass
+
+
+def set_vmin_vtime(ser, vmin=1, vtime=1):
+    """
+    Give the tty intercharacter-timeout read semantics: a blocking read
+    waits for at least vmin bytes, then returns once the line idles for
+    vtime tenths of a second. Matches how the firmware emits each
+    response as one short burst. No-op on platforms without termios.
+    """
+
+    try:
+        import termios
+    except ImportError:
+        return
+    try:
+        attrs = termios.tcgetattr(ser.fd)
+        attrs[6][termios.VMIN] = vmin
+        attrs[6][termios.VTIME] = vtime
+        termios.tcsetattr(ser.fd, termios.TCSANOW, attrs)
+    except termios.error:
+        pass
+
+
+def wait_for_bytes(ser, deadline):
+    """
+    Block until the port has data to read or the deadline passes.
+    Sleeps in select() on the serial fd where one exists, so the drain
+    loops wake exactly when bytes arrive instead of spinning on 1 ms
+    sleeps; ports without a selectable fd (Windows) fall back to the
+    short sleep. Returns False once the deadline has passed.
+    """
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return False
+    try:
+        fd = ser.fileno()
+    except Exception:
+        time.sleep(min(0.001, remaining))
+        return True
+    readable, _, _ = select.select([fd], [], [], remaining)
+    return bool(readable)
+
+
+class UartTransport:
+    """
+    Event-driven request/response wrapper around an open serial port,
+    shared by the CLI and the GUI worker.
+    Reads drain whatever the driver has buffered in one read(in_waiting)
+    call per wakeup and return as soon as a full line arrives; the port
+    should be opened non-blocking (timeout=0).
+    """
+
+    def __init__(self, ser):
+        self.ser = ser
+        self._rx_buf = bytearray()
+        # Complete lines that arrived outside a request/response pair
+        # (boot banner, async firmware events); callers drain and log
+        # them as they see fit.
+        self.async_lines = collections.deque()
+
+    def poll_async(self):
+        """
+        Sweep bytes the device pushed outside a request into
+        async_lines, so a boot banner or async event can't be mistaken
+        for the next command's response.
+        """
+
+        n = self.ser.in_waiting
+        if n:
+            self._rx_buf += self.ser.read(n)
+        while b'\n' in self._rx_buf:
+            line, _, self._rx_buf = self._rx_buf.partition(b'\n')
+            self.async_lines.append(line.strip().decode('ascii', 'replace'))
+
+    def read_line(self, deadline):
+        """
+        Pop one complete line from the RX buffer, draining new bytes as
+        they arrive; bytes past the newline stay buffered for the next
+        call. Returns the line without its terminator, or None on
+        timeout.
+        """
+
+        while b'\n' not in self._rx_buf:
+            if time.monotonic() >= deadline:
+                return None
+            n = self.ser.in_waiting
+            if n:
+                self._rx_buf += self.ser.read(n)
+            elif not wait_for_bytes(self.ser, deadline):
+                return None
+        line, _, self._rx_buf = self._rx_buf.partition(b'\n')
+        return line
+
+    def request(self, cmd, timeout=0.5):
+        """
+        Send pre-encoded command bytes and return the response line as
+        a string, or "" if no full line arrived before the timeout.
+        Lines already buffered when the command is sent go to
+        async_lines, and an echo of the command itself is skipped.
+        """
+
+        self.poll_async()
+        self.ser.write(cmd)
+        echo = bytes(cmd).strip()
+        deadline = time.monotonic() + timeout
+        while True:
+            line = self.read_line(deadline)
+            if line is None:
+                return ""
+            line = bytes(line).strip()
+            if line == echo:
+                continue
+            return line.decode('ascii', 'replace')
+
+    def request_batch(self, cmds, timeout=0.5):
+        """
+        Run several commands back-to-back, sending each one as soon as
+        the previous response arrives. This link is latency-bound, not
+        compute-bound, but the firmware receives one byte per interrupt
+        into a single-byte RDR and answers with a blocking transmit
+        before re-arming reception, so bytes kept in flight during a
+        response are dropped via overrun — the batch has to pace on the
+        response rather than pipeline. Compared to clicking through the
+        registers one by one this still skips every fixed per-command
+        delay; timeout applies per command. Returns one response string
+        per command ("" on timeout).
+        """
+
+        return [self.request(cmd, timeout) for cmd in cmds]
+
+
+# Opcodes for the opt-in binary framing below
+REQ_READ = 0x01
+REQ_WRITE = 0x02
+
+
+class BinaryTransport(UartTransport):
+    """
+    Fixed-size binary framing for firmware builds that support it.
+    Requests are struct-packed (opcode + little-endian address, plus a
+    value for writes) and every reply is 5 bytes: status byte followed
+    by a little-endian 32-bit value. Cuts the ASCII hex round-trip
+    (snprintf on the MCU, int(x, 16) here) out of the hot path. The
+    shipped firmware still speaks the text protocol, so this stays
+    opt-in until it grows a binary command handler.
+    """
+
+    def _read_exactly(self, count, deadline):
+        """Return exactly count bytes from RX, or None on timeout."""
+
+        while len(self._rx_buf) < count:
+            if time.monotonic() >= deadline:
+                return None
+            n = self.ser.in_waiting
+            if n:
+                self._rx_buf += self.ser.read(n)
+            elif not wait_for_bytes(self.ser, deadline):
+                return None
+        resp = bytes(self._rx_buf[:count])
+        del self._rx_buf[:count]
+        return resp
+
+    def read_register(self, addr, timeout=0.5):
+        """Read one 32-bit register; returns the value or None on error."""
+
+        self.ser.write(struct.pack("<BI", REQ_READ, addr))
+        resp = self._read_exactly(5, time.monotonic() + timeout)
+        if resp is None:
+            return None
+        status, value = struct.unpack("<BI", resp)
+        return value if status == 0 else None
+
+    def write_register(self, addr, value, timeout=0.5):
+        """Write one 32-bit register; returns True on success."""
+
+        self.ser.write(struct.pack("<BII", REQ_WRITE, addr, value))
+        resp = self._read_exactly(5, time.monotonic() + timeout)
+        if resp is None:
+            return False
+        status, _ = struct.unpack("<BI", resp)
+        return status == 0